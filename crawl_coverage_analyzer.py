@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+"""
+Coverage analyzer for the multi-site legal web crawler.
+
+Compares the visited URLs recorded in the crawl progress file against the
+URLs already stored in the database, to show how much of a domain has been
+covered and where the gaps are.
+
+Usage:
+    python crawl_coverage_analyzer.py analyze <domain> [--json]
+    python crawl_coverage_analyzer.py compare <domain> [--json]
+    python crawl_coverage_analyzer.py missing <domain> [--json]
+    python crawl_coverage_analyzer.py stats <domain> [--json]
+
+With --json the already-computed result dict is emitted as JSON and all
+of the formatted report output is skipped, for scripted/CI use.
+"""
+import heapq
+import json
+import sys
+from bisect import insort
+from collections import defaultdict
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from crawler.config import TARGET_SITES
+from crawler.crawler import load_progress
+from crawler.db import (
+    get_existing_urls_for_domain,
+    get_existing_urls_iter,
+    get_domain_stats_from_db,
+)
+
+# Memoized per-domain loads: running several subcommands in one process
+# (or the same subcommand twice) re-parses a potentially huge progress
+# file and re-queries the DB otherwise.
+_progress = lru_cache(maxsize=8)(load_progress)
+_db_urls = lru_cache(maxsize=8)(get_existing_urls_for_domain)
+_db_stats = lru_cache(maxsize=8)(get_domain_stats_from_db)
+
+
+# Coverage quality tiers, highest threshold first; shared by the analyze
+# and stats subcommands so the thresholds cannot drift apart
+COVERAGE_TIERS = (
+    (99.5, '✅ EXCELLENT'),
+    (95.0, '⚠️ GOOD'),
+    (80.0, '⚠️ MODERATE'),
+    (0.0, '❌ POOR'),
+)
+
+
+def coverage_tier(pct):
+    """Map a coverage percentage onto its quality tier label"""
+    return next(label for threshold, label in COVERAGE_TIERS if pct >= threshold)
+
+
+def url_path_parts(url):
+    """
+    Return the path components of a URL using plain string slicing.
+
+    Avoids urlparse() here on purpose: these helpers run over every URL in
+    both the DB and progress sets, and urlparse allocates a 6-field
+    ParseResult per call just to get at the path.
+    """
+    scheme_end = url.find('://')
+    path_start = url.find('/', scheme_end + 3 if scheme_end != -1 else 0)
+    if path_start == -1:
+        return []
+    return [p for p in url[path_start:].split('/') if p]
+
+
+def format_pattern(parts):
+    """Render a pattern tuple as '/a/b/' for display"""
+    return '/' + '/'.join(parts) + '/' if parts else '/'
+
+
+def scan_urls(urls):
+    """
+    Single fused pass over a URL set returning (patterns, depth distribution).
+
+    Callers that need both results should use this instead of calling
+    analyze_url_patterns and get_depth_distribution separately, which would
+    walk the same set (and re-split the same paths) twice.
+    """
+    patterns = set()
+    distribution = defaultdict(int)
+    for url in urls:
+        path_parts = url_path_parts(url)
+        distribution[len(path_parts)] += 1
+        if path_parts:
+            # Tuples hash as fast as strings and skip the join/concat
+            # allocations; format_pattern renders them for display.
+            patterns.add(tuple(path_parts[:2]))
+    return patterns, dict(distribution)
+
+
+def analyze_url_patterns(urls):
+    """Collect the set of two-level path prefixes (e.g. '/legal/cases/')"""
+    patterns, _ = scan_urls(urls)
+    return patterns
+
+
+def get_depth_distribution(urls):
+    """Return a mapping of path depth -> number of URLs at that depth"""
+    distribution = defaultdict(int)
+    for url in urls:
+        scheme_end = url.find('://')
+        path_start = url.find('/', scheme_end + 3 if scheme_end != -1 else 0)
+        if path_start == -1:
+            depth = 0
+        else:
+            # str.count scans in C; normalize_url strips trailing slashes,
+            # so every '/' from the path start marks one component.
+            depth = url.count('/', path_start)
+            if url.endswith('/'):
+                depth -= 1
+        distribution[depth] += 1
+    return dict(distribution)
+
+
+def group_urls_by_pattern(urls):
+    """Group URLs by their two-level path prefix"""
+    groups = defaultdict(list)
+    for url in urls:
+        path_parts = url_path_parts(url)
+        groups[tuple(path_parts[:2])].append(url)
+    return dict(groups)
+
+
+def analyze_coverage(domain, as_json=False):
+    """Full coverage report: progress vs database for one domain"""
+    if not as_json:
+        print(f"\n=== Coverage analysis for {domain} ===")
+    progress_urls = _progress(domain)
+
+    # Stream the DB side and tally against the (smaller) progress set, so
+    # peak memory stays O(|progress|) instead of O(|DB| + |progress|).
+    # A fingerprint set serves as a bloom-style pre-check: misses are
+    # rejected on an int probe, and only probable hits pay the exact
+    # string comparison that keeps the missing classification correct.
+    progress_fp = {hash(url) for url in progress_urls}
+    db_total = 0
+    overlap = 0
+    missing_count = 0
+    missing_sample = []
+    for url in get_existing_urls_iter(domain):
+        db_total += 1
+        if hash(url) in progress_fp and url in progress_urls:
+            overlap += 1
+        else:
+            missing_count += 1
+            if len(missing_sample) < 10:
+                missing_sample.append(url)
+
+    if not db_total:
+        if as_json:
+            return {'domain': domain, 'db_urls': 0}
+        print("No URLs found in the database for this domain.")
+        return
+
+    extra_count = len(progress_urls) - overlap
+    coverage_pct = overlap / db_total * 100
+
+    if as_json:
+        # Skip the depth/deep-URL breakdown and every formatted print
+        return {
+            'domain': domain,
+            'db_urls': db_total,
+            'progress_urls': len(progress_urls),
+            'overlap': overlap,
+            'missing': missing_count,
+            'extra': extra_count,
+            'coverage_pct': round(coverage_pct, 2),
+            'missing_sample': missing_sample,
+        }
+
+    print(f"URLs in database:  {db_total:,}")
+    print(f"URLs in progress:  {len(progress_urls):,}")
+    print(f"Overlap:           {overlap:,}")
+    print(f"Missing from progress: {missing_count:,}")
+    print(f"Extra in progress:     {extra_count:,}")
+    print(f"Coverage: {coverage_pct:.2f}%")
+
+    print(f"Quality: {coverage_tier(coverage_pct)}")
+
+    # Depth breakdown of the crawled URLs
+    depth_dist = get_depth_distribution(progress_urls)
+    if depth_dist:
+        print("\nDepth distribution (progress):")
+        for depth in sorted(depth_dist):
+            print(f"   depth {depth}: {depth_dist[depth]:,}")
+
+    progress_depth = 3
+    deep_urls = sum(1 for u in progress_urls if u.count('/') >= progress_depth)
+    print(f"URLs at depth >= {progress_depth}: {deep_urls:,}")
+
+    if missing_sample:
+        print("\nSample of missing URLs:")
+        # One write per block instead of one syscall per URL
+        sys.stdout.write('\n'.join(f"   {i + 1}. {url}" for i, url in enumerate(missing_sample)) + '\n')
+
+
+def compare_progress_vs_database(domain, as_json=False):
+    """Compare URL patterns and depth distributions between the two sets"""
+    if not as_json:
+        print(f"\n=== Pattern comparison for {domain} ===")
+    progress_urls = _progress(domain)
+    db_urls = _db_urls(domain)
+
+    db_patterns, db_depths = scan_urls(db_urls)
+    progress_patterns, progress_depths = scan_urls(progress_urls)
+
+    if as_json:
+        return {
+            'domain': domain,
+            'db_patterns': len(db_patterns),
+            'progress_patterns': len(progress_patterns),
+            'only_in_db': len(db_patterns - progress_patterns),
+            'only_in_progress': len(progress_patterns - db_patterns),
+            'db_depths': {str(d): c for d, c in db_depths.items()},
+            'progress_depths': {str(d): c for d, c in progress_depths.items()},
+        }
+
+    print(f"Patterns in database: {len(db_patterns):,}")
+    print(f"Patterns in progress: {len(progress_patterns):,}")
+    print(f"Patterns only in database: {len(db_patterns - progress_patterns):,}")
+    print(f"Patterns only in progress: {len(progress_patterns - db_patterns):,}")
+
+    only_db = heapq.nsmallest(10, db_patterns - progress_patterns)
+    if only_db:
+        print("\nSample patterns not yet crawled:")
+        sys.stdout.write('\n'.join(f"   {i + 1}. {format_pattern(pattern)}" for i, pattern in enumerate(only_db)) + '\n')
+
+    print("\nDepth distribution (database vs progress):")
+    for depth in sorted(set(db_depths) | set(progress_depths)):
+        print(f"   depth {depth}: {db_depths.get(depth, 0):,} vs {progress_depths.get(depth, 0):,}")
+
+
+def show_missing_urls(domain, as_json=False):
+    """List URLs present in the database but absent from the progress file"""
+    if not as_json:
+        print(f"\n=== Missing URLs for {domain} ===")
+    progress_urls = _progress(domain)
+    db_urls = _db_urls(domain)
+
+    # Count, bucket and sample the missing URLs in one filtered pass
+    # instead of materializing the full db - progress difference set.
+    # The sample keeps the 50 smallest URLs in a sorted buffer; once it is
+    # full, most URLs are pruned by a single comparison against its max.
+    missing_count = 0
+    patterns = set()
+    sample = []
+    for url in db_urls:
+        if url in progress_urls:
+            continue
+        missing_count += 1
+        patterns.add(tuple(url_path_parts(url)[:2]))
+        if len(sample) < 50:
+            insort(sample, url)
+        elif url < sample[-1]:
+            insort(sample, url)
+            sample.pop()
+
+    if as_json:
+        return {
+            'domain': domain,
+            'missing': missing_count,
+            'patterns': len(patterns),
+            'sample': sample,
+        }
+
+    if not missing_count:
+        print("No missing URLs - progress covers the database.")
+        return
+
+    print(f"Missing URLs: {missing_count:,}")
+    print(f"Across {len(patterns):,} URL patterns.")
+
+    print("\nSample of missing URLs:")
+    sys.stdout.write('\n'.join(f"   {i + 1}. {url}" for i, url in enumerate(sample)) + '\n')
+
+
+def show_coverage_stats(domain, as_json=False):
+    """Show database statistics and a coverage summary for one domain"""
+    if not as_json:
+        print(f"\n=== Coverage stats for {domain} ===")
+    stats = _db_stats(domain)
+    progress_urls = _progress(domain)
+
+    # Only counts are needed here, so probe 64-bit string-hash fingerprints
+    # of the progress set while streaming the DB side: membership tests hash
+    # one int instead of a full URL and no DB-side string set is built.
+    progress_fp = {hash(url) for url in progress_urls}
+    db_total = 0
+    overlap = 0
+    for url in get_existing_urls_iter(domain):
+        db_total += 1
+        if hash(url) in progress_fp:
+            overlap += 1
+
+    coverage_pct = overlap / db_total * 100 if db_total else None
+
+    if as_json:
+        result = dict(stats)
+        result['domain'] = domain
+        result['coverage_pct'] = round(coverage_pct, 2) if coverage_pct is not None else None
+        return result
+
+    print(f"Total URLs in database: {stats['total_urls']:,}")
+    print(f"Status 200:             {stats['status_200']:,}")
+    print(f"With title:             {stats['with_title']:,}")
+    print(f"With parent:            {stats['with_parent']:,}")
+    if coverage_pct is not None:
+        print(f"Progress coverage: {coverage_pct:.2f}%")
+        print(f"Quality: {coverage_tier(coverage_pct)}")
+
+
+def show_help():
+    print(__doc__)
+    print("Known domains:")
+    for site in TARGET_SITES:
+        print(f"   {site['domain']} ({site['name']})")
+
+
+# Subcommand dispatch table; every command takes a domain argument
+COMMANDS = {
+    'analyze': analyze_coverage,
+    'compare': compare_progress_vs_database,
+    'missing': show_missing_urls,
+    'stats': show_coverage_stats,
+}
+
+
+def main():
+    as_json = '--json' in sys.argv[1:]
+    args = [a for a in sys.argv[1:] if a != '--json']
+    if not args:
+        show_help()
+        return
+
+    command = args[0].lower()
+    handler = COMMANDS.get(command)
+    if handler is None:
+        show_help()
+        return
+    if len(args) < 2:
+        print(f"Usage: python crawl_coverage_analyzer.py {command} <domain> [--json]")
+        return
+
+    result = handler(args[1], as_json=as_json)
+    if as_json:
+        payload = orjson.dumps(result) if orjson else json.dumps(result).encode('utf-8')
+        sys.stdout.buffer.write(payload + b'\n')
+
+
+if __name__ == "__main__":
+    main()
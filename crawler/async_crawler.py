@@ -0,0 +1,225 @@
+"""Asyncio-based crawl core using aiohttp.
+
+Alternative to the threaded crawler in crawler.crawler for I/O-bound
+crawls: one event loop with a pool of worker tasks per site keeps many
+fetches in flight on a single thread, without per-thread stack memory or
+GIL contention. Enabled with --use-async on the command line.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import aiohttp
+
+from .config import MAX_THREADS, PARSE_PROCESSES, TARGET_SITES
+from .crawler import (
+    MAX_CONTENT_BYTES,
+    accept_url,
+    decode_content,
+    extract_links,
+    extract_title,
+    get_rate_limiter,
+    is_parseable_content_type,
+    is_valid_url,
+    load_progress,
+    parse_page,
+    save_progress,
+)
+from .db import close_case_writer, get_case_writer
+from .breadcrumb import extract_breadcrumb
+
+logger = logging.getLogger(__name__)
+
+# Parsing a large page is milliseconds of pure CPU; done inline it would
+# stall every other coroutine on the loop. The pool keeps the loop free
+# for I/O, and lxml/selectolax release the GIL while parsing in C.
+# PARSE_PROCESSES swaps in a process pool for true parallelism when the
+# Python-side extraction work itself becomes the bottleneck; everything
+# submitted (_parse_for_store and its arguments/results) is picklable.
+if PARSE_PROCESSES:
+    _parse_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+else:
+    _parse_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='parse')
+
+
+def _parse_for_store(html, content_type, normalized_url, want_links):
+    """Parse once and pull out everything the store step needs.
+
+    Runs on the parse pool so the event loop never blocks on CPU work;
+    returns (title, path_url, links) or None if the page did not parse.
+    """
+    tree = parse_page(html, content_type)
+    if not tree:
+        return None
+    title = extract_title(tree) or normalized_url
+    path_url = extract_breadcrumb(tree, normalized_url)
+    links = extract_links(tree, normalized_url, html) if want_links else ()
+    return title, path_url, links
+
+
+class VisitedActor:
+    """Single task owning every domain's visited set.
+
+    Workers never touch the sets directly: add_if_new() posts
+    (domain, url, future) on a queue and the actor answers each message
+    in a tight serial loop. That makes the check-and-mark atomic by
+    construction — no locks, no double-crawl races — and gives one
+    chokepoint where dedup can later be batched or instrumented.
+    """
+
+    def __init__(self):
+        self._queue = asyncio.Queue()
+        self._sets = {}
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name='visited-actor')
+
+    def load_domain(self, domain):
+        """Seed a domain's set from the saved progress file"""
+        self._sets[domain] = load_progress(domain)
+
+    async def add_if_new(self, domain, url):
+        """Mark url visited; resolves True if it was not already present"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((domain, url, future))
+        return await future
+
+    def snapshot(self, domain):
+        """The domain's visited set, for persisting progress"""
+        return self._sets[domain]
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        sets = self._sets
+        get = self._queue.get
+        while True:
+            domain, url, future = await get()
+            visited = sets[domain]
+            if url in visited:
+                future.set_result(False)
+            else:
+                visited.add(url)
+                future.set_result(True)
+
+
+async def _crawl_one(http, queue, visited, url, domain, parent_id, depth, max_depth):
+    """Fetch, parse and store a single page, enqueueing its links"""
+    normalized_url = accept_url(url, domain)
+    if not normalized_url:
+        return
+    if not await visited.add_if_new(domain, normalized_url):
+        return
+
+    logger.info(f"Crawling [{domain}] (async depth {depth}): {normalized_url}")
+    wait = get_rate_limiter(domain).reserve()
+    if wait > 0:
+        await asyncio.sleep(wait)
+    etag = last_modified = None
+    try:
+        async with http.get(normalized_url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            status_code = resp.status
+            content_type = resp.headers.get('content-type', '')
+            if status_code == 200:
+                # Store the validators like the threaded path does, so a
+                # later conditional re-crawl has them — and so the upsert
+                # does not overwrite ones a previous crawl already saved
+                etag = resp.headers.get('ETag')
+                last_modified = resp.headers.get('Last-Modified')
+            if status_code != 200 or not is_parseable_content_type(content_type):
+                html = ""
+            elif resp.content_length and resp.content_length > MAX_CONTENT_BYTES:
+                logger.warning(
+                    f"Skipping oversized body ({resp.content_length} bytes) at {normalized_url}")
+                html = ""
+            else:
+                # aiohttp parses the charset= parameter into resp.charset;
+                # None when undeclared, which lets decode_content detect
+                encoding = resp.charset
+                # Capped read so a lying Content-Length can't balloon memory
+                body = await resp.content.read(MAX_CONTENT_BYTES)
+                html = decode_content(body, encoding)
+    except Exception as e:
+        logger.error(f"Error fetching {normalized_url}: {e}")
+        return
+
+    parsed = await asyncio.get_running_loop().run_in_executor(
+        _parse_pool, _parse_for_store, html, content_type, normalized_url, depth < max_depth)
+    if parsed is None:
+        logger.warning(f"Could not parse content from {normalized_url}")
+        return
+    title, path_url, links = parsed
+
+    # Queue the row for the batch writer; put() never blocks the event loop
+    case_id = get_case_writer().put(normalized_url, parent_id, path_url, title, status_code,
+                                    etag=etag, last_modified=last_modified)
+    if case_id is None:
+        return
+
+    for link in links:
+        if is_valid_url(link, domain):
+            queue.put_nowait((link, case_id, depth + 1))
+
+
+async def crawl_site_async(http, visited, site_config, max_depth=5):
+    """Crawl one site with a pool of worker tasks sharing a queue"""
+    domain = site_config['domain']
+    start_url = site_config['start_url']
+    site_name = site_config['name']
+
+    logger.info(f"Starting async crawl for {site_name} ({domain})")
+    queue = asyncio.Queue()
+    queue.put_nowait((start_url, None, 0))
+    visited.load_domain(domain)
+
+    async def worker():
+        while True:
+            url, parent_id, depth = await queue.get()
+            try:
+                await _crawl_one(http, queue, visited, url, domain, parent_id, depth, max_depth)
+            except Exception as e:
+                logger.error(f"Worker error for {url}: {e}")
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(MAX_THREADS)]
+    try:
+        await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+    save_progress(domain, visited.snapshot(domain))
+    logger.info(f"Completed async crawl for {site_name}")
+
+
+async def _crawl_all(sites, max_depth):
+    connector = aiohttp.TCPConnector(
+        limit=MAX_THREADS * 8,
+        limit_per_host=16,
+        keepalive_timeout=75,
+        enable_cleanup_closed=True,
+        ttl_dns_cache=300,
+    )
+    visited = VisitedActor()
+    visited.start()
+    try:
+        async with aiohttp.ClientSession(connector=connector) as http:
+            await asyncio.gather(*(crawl_site_async(http, visited, site, max_depth) for site in sites))
+    finally:
+        visited.stop()
+
+
+def start_crawl_async(max_depth=5, sites=None):
+    """Start crawling all sites on a single asyncio event loop"""
+    if sites is None:
+        sites = TARGET_SITES
+    logger.info(f"Starting multi-site async crawl with {MAX_THREADS} workers per site")
+    logger.info(f"Target sites: {[site['name'] for site in sites]}")
+    asyncio.run(_crawl_all(sites, max_depth))
+    # Flush any rows still queued in the batch writer
+    close_case_writer()
+    logger.info("Multi-site async crawl completed")
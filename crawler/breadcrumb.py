@@ -1,18 +1,31 @@
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 
-def extract_breadcrumb(soup: BeautifulSoup, url: str) -> str:
-    # Look for common breadcrumb containers
-    breadcrumb_selectors = [
-        '[class*="breadcrumb"]',
-        'nav.breadcrumb',
-        'ul.breadcrumb',
-        'div.breadcrumb',
-        'nav[aria-label="breadcrumb"]',
-    ]
-    for selector in breadcrumb_selectors:
-        el = soup.select_one(selector)
-        if el:
+# selectolax queries the tree from C and is much faster than bs4 navigation
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+# Common breadcrumb containers, combined into one selector so soupsieve
+# compiles it once and a single DOM walk (with early exit) covers all cases
+BREADCRUMB_SELECTOR = (
+    '[class*="breadcrumb"], nav.breadcrumb, ul.breadcrumb, '
+    'div.breadcrumb, nav[aria-label="breadcrumb"]'
+)
+
+def extract_breadcrumb(soup, url: str) -> str:
+    # `soup` may be a BeautifulSoup document or a selectolax HTMLParser tree
+    if HTMLParser is not None and isinstance(soup, HTMLParser):
+        el = soup.css_first(BREADCRUMB_SELECTOR)
+        if el is not None:
+            parts = [text for n in el.css('a, span') if (text := n.text(strip=True))]
+            if parts:
+                return ' > '.join(parts)
+    else:
+        # Look for common breadcrumb containers; iselect stops walking the
+        # DOM as soon as a container with usable text is found
+        for el in soup.css.iselect(BREADCRUMB_SELECTOR):
             # Join text from <a> and <span> in breadcrumb
             parts = [a.get_text(strip=True) for a in el.find_all(['a', 'span']) if a.get_text(strip=True)]
             if parts:
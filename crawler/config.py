@@ -10,34 +10,64 @@ DB_USER = os.getenv('DB_USER', 'mindlex_dev_usr')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'SF-05a_15aJe6LOu')
 
 CRAWL_DELAY = float(os.getenv('CRAWL_DELAY', 0.01))  # seconds
+# Batch writer tuning: rows per transaction and how long a partial batch
+# may wait before being flushed anyway
+DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', 100))
+DB_FLUSH_INTERVAL = float(os.getenv('DB_FLUSH_INTERVAL', 0.5))  # seconds
+# 'memory' keeps visited URLs in an in-process set; 'sqlite' stores one
+# 64-bit hash per URL on disk so multi-million-URL crawls stay flat in
+# RAM; 'bloom' trades a tiny false-positive rate for a few bytes per URL
+# (requires pybloom-live)
+VISITED_BACKEND = os.getenv('VISITED_BACKEND', 'memory')
+# Parse offload for the async crawler: threads by default, since lxml
+# and selectolax release the GIL while parsing in C; set to true to use
+# worker processes instead on many-core hosts where Python-side tree
+# walking still contends on the GIL (costs a pickle per page each way)
+PARSE_PROCESSES = os.getenv('PARSE_PROCESSES', 'false').lower() == 'true'
 IS_CHECK = os.getenv('IS_CHECK', 'true').lower() == 'true'  # Check and update existing URLs
 MAX_THREADS = int(os.getenv('MAX_THREADS', 5))  # Number of threads for crawling
+# Largest response body ever materialized in memory; bigger bodies are
+# skipped (declared length) or truncated (streamed)
+MAX_CONTENT_BYTES = int(os.getenv('MAX_CONTENT_BYTES', 5 * 1024 * 1024))
+
+# File extensions that are never worth fetching as HTML pages. A single
+# shared frozenset keeps per-URL membership checks O(1) and avoids each
+# site entry carrying its own copy of the list.
+DEFAULT_EXCLUDE_EXTENSIONS = frozenset((
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.zip', '.rar', '.tar', '.gz'
+))
 
 # Target websites configuration
 TARGET_SITES = [
     {
         'domain': 'eur-lex.europa.eu',
         'start_url': 'https://eur-lex.europa.eu',
-        'name': 'EUR-Lex'
+        'name': 'EUR-Lex',
+        'exclude_extensions': DEFAULT_EXCLUDE_EXTENSIONS
     },
     {
         'domain': 'cylaw.org',
         'start_url': 'https://cylaw.org',
-        'name': 'CyLaw'
+        'name': 'CyLaw',
+        'exclude_extensions': DEFAULT_EXCLUDE_EXTENSIONS
     },
     {
         'domain': 'hudoc.echr.coe.int',
         'start_url': 'https://hudoc.echr.coe.int',
-        'name': 'HUDOC'
+        'name': 'HUDOC',
+        'exclude_extensions': DEFAULT_EXCLUDE_EXTENSIONS
     },
     {
         'domain': 'curia.europa.eu',
         'start_url': 'https://curia.europa.eu',
-        'name': 'Curia'
+        'name': 'Curia',
+        'exclude_extensions': DEFAULT_EXCLUDE_EXTENSIONS
     },
     {
         'domain': 'www.bailii.org',
         'start_url': 'https://www.bailii.org',
-        'name': 'Bailii'
+        'name': 'Bailii',
+        'exclude_extensions': DEFAULT_EXCLUDE_EXTENSIONS
     }
 ] 
\ No newline at end of file
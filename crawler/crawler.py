@@ -1,53 +1,694 @@
-# Placeholder for crawler logic 
+# Placeholder for crawler logic
 import time
+import hashlib
+import json
+import os
+import queue
+import re
+import socket
+import sqlite3
+import sys
 import requests
+import lxml.html
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import warnings
 import chardet
 from collections import deque
-from .config import CRAWL_DELAY, IS_CHECK, MAX_THREADS, TARGET_SITES
-from .db import get_session, insert_or_update_case
+from datetime import datetime
+from functools import lru_cache
+
+# orjson parses large progress files several times faster than stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# cchardet detects in C when installed; charset_normalizer ships with
+# requests and is still much faster than chardet, the last fallback
+try:
+    import cchardet
+except ImportError:
+    cchardet = None
+try:
+    from charset_normalizer import from_bytes as _charset_normalizer_from_bytes
+except ImportError:
+    _charset_normalizer_from_bytes = None
+
+# Advertise brotli only when a decoder is importable; otherwise servers
+# would send br bodies urllib3 cannot transparently decompress
+try:
+    import brotli  # noqa: F401
+    _HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _HAS_BROTLI = True
+    except ImportError:
+        _HAS_BROTLI = False
+
+# pybloom-live backs the optional approximate visited-set backend
+try:
+    from pybloom_live import ScalableBloomFilter
+except ImportError:
+    ScalableBloomFilter = None
+
+# selectolax extracts links in C without building a bs4 tree per page
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+from .config import (
+    CRAWL_DELAY,
+    IS_CHECK,
+    MAX_CONTENT_BYTES,
+    MAX_THREADS,
+    TARGET_SITES,
+    VISITED_BACKEND,
+)
+from .db import close_case_writer, get_case_writer, get_validators_for_domain
 from .breadcrumb import extract_breadcrumb
-from .utils import normalize_url
+from .utils import normalize_url, should_skip_url
 
 # Suppress BeautifulSoup warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="bs4")
 
 logger = logging.getLogger(__name__)
 
+class ShardedVisitedSet:
+    """Thread-safe visited-URL set split across independently locked shards.
+
+    A single lock around the per-domain set serializes every worker on
+    every link considered; sharding by URL hash cuts that contention to
+    1/SHARD_COUNT while keeping de-duplication exact.
+    """
+    SHARD_COUNT = 16  # power of two so the index is a mask
+    needs_progress_file = True  # resumability comes from the JSON file
+
+    __slots__ = ('_shards', '_locks')
+
+    def __init__(self, urls=()):
+        self._shards = [set() for _ in range(self.SHARD_COUNT)]
+        self._locks = [threading.Lock() for _ in range(self.SHARD_COUNT)]
+        for url in urls:
+            self._shards[hash(url) & (self.SHARD_COUNT - 1)].add(url)
+
+    def add_if_new(self, url):
+        """Add url to the set; returns True if it was not already present"""
+        index = hash(url) & (self.SHARD_COUNT - 1)
+        with self._locks[index]:
+            shard = self._shards[index]
+            if url in shard:
+                return False
+            shard.add(url)
+            return True
+
+    def __contains__(self, url):
+        return url in self._shards[hash(url) & (self.SHARD_COUNT - 1)]
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def __iter__(self):
+        for shard in self._shards:
+            yield from tuple(shard)
+
+class SqliteVisitedSet:
+    """Disk-backed visited set storing one 64-bit hash per URL.
+
+    The in-memory sets hold every URL string (URL bytes plus ~50 bytes of
+    str overhead each), which reaches GB scale at millions of URLs. This
+    keeps only an 8-byte blake2b hash per URL in a sqlite file, so memory
+    stays flat and the set survives restarts without the JSON progress
+    file. Selected with VISITED_BACKEND=sqlite.
+    """
+    needs_progress_file = False  # the sqlite file itself is the saved progress
+
+    __slots__ = ('_conn', '_lock', '_count')
+
+    def __init__(self, domain, urls=()):
+        path = f"visited_{domain.replace('/', '_')}.sqlite3"
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS visited (h INTEGER PRIMARY KEY)')
+        self._lock = threading.Lock()
+        if urls:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO visited (h) VALUES (?)',
+                ((self._hash(url),) for url in urls),
+            )
+        self._count = self._conn.execute('SELECT COUNT(*) FROM visited').fetchone()[0]
+
+    @staticmethod
+    def _hash(url):
+        # blake2b is stable across processes, unlike hash() under
+        # PYTHONHASHSEED, so the stored hashes survive restarts
+        return int.from_bytes(
+            hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(),
+            'big', signed=True,
+        )
+
+    def add_if_new(self, url):
+        """Add url to the set; returns True if it was not already present"""
+        h = self._hash(url)
+        with self._lock:
+            cursor = self._conn.execute('INSERT OR IGNORE INTO visited (h) VALUES (?)', (h,))
+            if cursor.rowcount == 1:
+                self._count += 1
+                return True
+            return False
+
+    def __contains__(self, url):
+        row = self._conn.execute(
+            'SELECT 1 FROM visited WHERE h = ?', (self._hash(url),)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self._count
+
+class BloomVisitedSet:
+    """Approximate visited set backed by a scalable Bloom filter.
+
+    A few bytes per URL instead of a full Python string, at the cost of
+    a tuned false-positive rate: about one page per million is wrongly
+    treated as already visited and skipped. Membership cannot be
+    enumerated, so no JSON progress file is written; instead the filter
+    itself is dumped to visited_<domain>.bloom at the save points and
+    reloaded on the next run. Selected with VISITED_BACKEND=bloom;
+    requires the pybloom-live package.
+    """
+    needs_progress_file = False  # the filter cannot be enumerated
+
+    __slots__ = ('_filter', '_lock', '_count', '_path')
+
+    def __init__(self, domain, urls=()):
+        if ScalableBloomFilter is None:
+            raise ImportError('VISITED_BACKEND=bloom requires the pybloom-live package')
+        self._path = f"visited_{domain.replace('/', '_')}.bloom"
+        self._filter = None
+        if os.path.exists(self._path):
+            try:
+                with open(self._path, 'rb') as f:
+                    self._filter = ScalableBloomFilter.fromfile(f)
+            except Exception as e:
+                logger.warning(f"Could not load bloom filter {self._path}: {e}")
+        if self._filter is None:
+            self._filter = ScalableBloomFilter(initial_capacity=1_000_000, error_rate=1e-6)
+        self._lock = threading.Lock()
+        self._count = len(self._filter)
+        for url in urls:
+            self.add_if_new(url)
+
+    def save(self):
+        """Dump the filter to disk; this is the backend's saved progress"""
+        with self._lock:
+            try:
+                with open(self._path, 'wb') as f:
+                    self._filter.tofile(f)
+            except OSError as e:
+                logger.error(f"Could not save bloom filter {self._path}: {e}")
+
+    def add_if_new(self, url):
+        """Add url to the set; returns True if it was not already present"""
+        # The filter has no atomic check-and-add of its own
+        with self._lock:
+            if url in self._filter:
+                return False
+            self._filter.add(url)
+            self._count += 1
+            return True
+
+    def __contains__(self, url):
+        return url in self._filter
+
+    def __len__(self):
+        return self._count
+
+class HostRateLimiter:
+    """Spaces fetches to one host by CRAWL_DELAY without stalling others.
+
+    The old blanket time.sleep(CRAWL_DELAY) after every page paused the
+    worker regardless of which host it was about to hit; politeness is a
+    per-host concept. reserve() hands out fetch slots spaced by the delay,
+    so callers only sleep when their own host's next slot is in the future.
+    Equivalent to a token bucket of capacity one refilling every delay
+    seconds — deliberately burst-free, since politeness is the point.
+    """
+    __slots__ = ('delay', '_lock', '_next_allowed')
+
+    def __init__(self, delay=CRAWL_DELAY):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def reserve(self):
+        """Claim the next fetch slot; returns seconds to wait before it"""
+        with self._lock:
+            now = time.monotonic()
+            start = self._next_allowed if self._next_allowed > now else now
+            self._next_allowed = start + self.delay
+            return start - now
+
+    def wait(self):
+        """Block until this host's next fetch slot (threaded crawl paths)"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(domain):
+    """Return the shared HostRateLimiter for a domain, creating it lazily"""
+    limiter = _rate_limiters.get(domain)
+    if limiter is None:
+        with _rate_limiters_lock:
+            limiter = _rate_limiters.setdefault(domain, HostRateLimiter())
+    return limiter
+
+USER_AGENT = 'crawl/1.0'
+
+_robots_parsers = {}
+_robots_lock = threading.Lock()
+
+def _fetch_robots_parser(domain):
+    """Fetch and parse a domain's robots.txt through the shared session.
+
+    Mirrors RobotFileParser.read() status handling (401/403 disallow,
+    other errors fail open) but with the session's timeout and retries,
+    so an unresponsive endpoint cannot hang a worker indefinitely.
+    """
+    parser = RobotFileParser(f'https://{domain}/robots.txt')
+    try:
+        resp = _shared_session.get(f'https://{domain}/robots.txt', timeout=10)
+        if resp.status_code == 200:
+            parser.parse(resp.text.splitlines())
+        elif resp.status_code in (401, 403):
+            parser.disallow_all = True
+        else:
+            parser.allow_all = True
+    except Exception as e:
+        logger.warning(f"Could not read robots.txt for {domain}: {e}")
+        parser.allow_all = True
+    return parser
+
+def get_robots_parser(domain):
+    """Return the parsed robots.txt for a domain, fetching it once.
+
+    Fetch or parse failures fail open (allow everything): politeness
+    should not stall a crawl because a robots.txt is unreachable. The
+    fetch itself runs outside _robots_lock so a slow endpoint never
+    blocks workers crawling other domains; two threads racing on the
+    same domain may both fetch, and setdefault keeps the first result.
+    """
+    parser = _robots_parsers.get(domain)
+    if parser is None:
+        parser = _fetch_robots_parser(domain)
+        with _robots_lock:
+            parser = _robots_parsers.setdefault(domain, parser)
+    return parser
+
+# Query parameters that never change the page content; URLs differing
+# only in these collapse to one fingerprint and one fetch
+_TRACKING_PARAM_NAMES = frozenset((
+    'sid', 'sessionid', 'phpsessid', 'jsessionid', 'gclid', 'fbclid'
+))
+
+def _is_tracking_param(param):
+    name = param.split('=', 1)[0].lower()
+    return name.startswith('utm_') or name in _TRACKING_PARAM_NAMES
+
+def url_fingerprint(url):
+    """Process-local fingerprint collapsing tracking/session-ID variants.
+
+    Tracking parameters are dropped and the rest sorted, so reordered or
+    utm-decorated links to the same page hash identically. Built-in
+    hash() is fine here: fingerprints never leave the process.
+    """
+    query_start = url.find('?')
+    if query_start == -1:
+        return hash(url)
+    base = url[:query_start]
+    kept = [p for p in url[query_start + 1:].split('&') if not _is_tracking_param(p)]
+    if not kept:
+        return hash(base)
+    kept.sort()
+    return hash(base + '?' + '&'.join(kept))
+
+# domain -> sharded set of fingerprints already enqueued
+_fingerprint_sets = {}
+_fingerprint_lock = threading.Lock()
+
+def _get_fingerprints(domain):
+    fingerprints = _fingerprint_sets.get(domain)
+    if fingerprints is None:
+        with _fingerprint_lock:
+            fingerprints = _fingerprint_sets.setdefault(domain, ShardedVisitedSet())
+    return fingerprints
+
+def should_fetch(url, domain):
+    """Pre-enqueue filters that cost no I/O: robots.txt and fingerprints.
+
+    Skipping a URL here eliminates its whole fetch — no CPU optimization
+    beats not doing the round-trip at all. Returns False for
+    robots-disallowed URLs and for duplicate-content variants whose
+    fingerprint was already enqueued.
+    """
+    if not get_robots_parser(domain).can_fetch(USER_AGENT, url):
+        return False
+    return _get_fingerprints(domain).add_if_new(url_fingerprint(url))
+
 # Thread-safe visited sets for each domain
 visited_sets = {}
-visited_locks = {}
 
-# Thread-local storage for per-thread requests.Session
-thread_local = threading.local()
+# getaddrinfo is a blocking libc call serialized across threads, and the
+# crawl resolves the same handful of site domains over and over whenever
+# the keep-alive pool opens a fresh connection. Cache positive results
+# for the same TTL the async connector uses (ttl_dns_cache=300); the
+# crawl targets are long-lived government hosts, so 5-minute staleness
+# is harmless and a failed lookup is never cached. The patch is only
+# installed when a crawl actually starts — importing this module for
+# load_progress or the analyzer leaves socket.getaddrinfo alone.
+_DNS_TTL = 300.0
+_DNS_CACHE_MAX = 512  # far above the handful of hosts a crawl touches
+_dns_cache = {}
+_dns_lock = threading.Lock()
+_uncached_getaddrinfo = socket.getaddrinfo
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    key = (host, port, family, type, proto, flags)
+    now = time.monotonic()
+    with _dns_lock:
+        entry = _dns_cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+    result = _uncached_getaddrinfo(host, port, family, type, proto, flags)
+    with _dns_lock:
+        if len(_dns_cache) >= _DNS_CACHE_MAX:
+            # Drop expired entries first; if the cache is genuinely full
+            # of live hosts, start over rather than grow without bound
+            expired = [k for k, (deadline, _) in _dns_cache.items() if deadline <= now]
+            for k in expired:
+                del _dns_cache[k]
+            if len(_dns_cache) >= _DNS_CACHE_MAX:
+                _dns_cache.clear()
+        _dns_cache[key] = (now + _DNS_TTL, result)
+    return result
+
+def _install_dns_cache():
+    """Route socket.getaddrinfo through the TTL cache (idempotent).
+
+    Called from the crawl entry points rather than at import time so the
+    process-wide patch never leaks into consumers that import this
+    module for its helpers only.
+    """
+    if socket.getaddrinfo is not _cached_getaddrinfo:
+        socket.getaddrinfo = _cached_getaddrinfo
+
+# One Session shared by every worker thread. urllib3's connection pool is
+# thread-safe, so this collapses the former per-thread pools (and their
+# separate TCP+TLS handshakes per host) into a single keep-alive pool.
+# Two quick retries with backoff smooth over transient resets without
+# re-queueing the page; 429/5xx responses retry the same way instead of
+# storing an error row for a page the server would have served moments
+# later.
+_http_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=max(64, MAX_THREADS * 4),
+    max_retries=requests.adapters.Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 502, 503, 504),
+    ),
+)
+_shared_session = requests.Session()
+_shared_session.mount('http://', _http_adapter)
+_shared_session.mount('https://', _http_adapter)
+_shared_session.headers['User-Agent'] = USER_AGENT  # match the robots.txt checks
+# Brotli bodies run ~20% smaller than gzip, so ask for br whenever a
+# decoder is present; requests decompresses whatever the server picks
+_shared_session.headers['Accept-Encoding'] = (
+    'gzip, deflate, br' if _HAS_BROTLI else 'gzip, deflate'
+)
+# Steer content negotiation toward the HTML we can actually parse
+_shared_session.headers['Accept'] = 'text/html,application/xhtml+xml'
+
+# Progress persistence for resumable crawls. Visited URLs live in one
+# append-only log per domain; the shared JSON file only keeps a tiny
+# summary (count, timestamp) per domain. Rewriting the full URL list
+# every save was O(visited_total); appending is O(new URLs since the
+# last save), and per-domain files mean saves for different sites never
+# contend on one lock.
+PROGRESS_FILE = 'crawl_progress.json'
+SAVE_INTERVAL = 100  # Save progress every N crawled URLs
+progress_lock = threading.Lock()  # guards the JSON summary file only
+
+# domain -> set of URLs already appended to that domain's log, so each
+# save writes only the delta. Shares string objects with the visited set.
+_logged_urls = {}
+_progress_locks = {}
+_progress_locks_guard = threading.Lock()
+
+def _progress_log_path(domain):
+    return f"visited_{domain.replace('/', '_')}.log"
+
+def _get_progress_lock(domain):
+    lock = _progress_locks.get(domain)
+    if lock is None:
+        with _progress_locks_guard:
+            lock = _progress_locks.setdefault(domain, threading.Lock())
+    return lock
+
+def _load_summary_entry(domain):
+    """The domain's entry from the JSON summary file, or {} if absent"""
+    with progress_lock:
+        if not os.path.exists(PROGRESS_FILE):
+            return {}
+        try:
+            with open(PROGRESS_FILE, 'rb') as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson else json.loads(raw)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load progress file: {e}")
+            return {}
+    return data.get(domain) or {}
+
+def load_progress(domain):
+    """Load the visited URL set saved for a domain.
+
+    Replays the domain's append-only log; a 'visited_urls' list in the
+    JSON file (the pre-log format) is folded in too and migrates to the
+    log on the next save, since only log lines count as logged.
+    """
+    # Intern so URLs shared with the DB-side sets reuse one string object
+    entry = _load_summary_entry(domain)
+    visited = set(map(sys.intern, entry.get('visited_urls', ())))
+    with _get_progress_lock(domain):
+        logged = _logged_urls.setdefault(domain, set())
+        log_path = _progress_log_path(domain)
+        if os.path.exists(log_path):
+            try:
+                with open(log_path, 'rb') as f:
+                    for line in f:
+                        url = sys.intern(line.rstrip(b'\n').decode('utf-8'))
+                        if url:
+                            visited.add(url)
+                            logged.add(url)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not replay visited log for {domain}: {e}")
+    return visited
+
+def save_progress(domain, visited_urls):
+    """Persist a domain's visited URLs: append new ones to its log.
+
+    Only URLs added since the previous save hit the disk; the log is
+    fsynced so a crash never loses acknowledged progress. The JSON file
+    is rewritten too, but it now carries only per-domain counts and
+    timestamps, so that write stays tiny regardless of crawl size.
+    """
+    with _get_progress_lock(domain):
+        logged = _logged_urls.setdefault(domain, set())
+        new_urls = [url for url in visited_urls if url not in logged]
+        if new_urls:
+            try:
+                with open(_progress_log_path(domain), 'ab') as f:
+                    f.write(b''.join(url.encode('utf-8') + b'\n' for url in new_urls))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logger.error(f"Could not append visited log for {domain}: {e}")
+                return
+            logged.update(new_urls)
+        url_count = len(logged)
+
+    with progress_lock:
+        data = {}
+        if os.path.exists(PROGRESS_FILE):
+            try:
+                with open(PROGRESS_FILE, 'rb') as f:
+                    raw = f.read()
+                data = orjson.loads(raw) if orjson else json.loads(raw)
+            except (OSError, ValueError):
+                data = {}
+        data[domain] = {
+            'url_count': url_count,
+            'updated_at': datetime.now().isoformat()
+        }
+        # Write-then-rename so a crash mid-write never leaves a truncated
+        # summary behind; os.replace is atomic on POSIX
+        try:
+            tmp_path = PROGRESS_FILE + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data) if orjson else json.dumps(data).encode('utf-8'))
+            os.replace(tmp_path, PROGRESS_FILE)
+        except OSError as e:
+            logger.error(f"Could not save progress file: {e}")
+
+def persist_visited(domain):
+    """Persist a domain's visited set however its backend requires.
+
+    Sharded sets go to the JSON progress file, Bloom filters dump
+    themselves, and the sqlite backend is already durable.
+    """
+    visited = visited_sets[domain]
+    if visited.needs_progress_file:
+        save_progress(domain, visited)
+    else:
+        save = getattr(visited, 'save', None)
+        if save is not None:
+            save()
+
+# url -> (etag, last_modified) from the most recent fetch; lets re-crawls
+# send conditional requests and skip download + parse on 304
+_validator_cache = {}
 
 def initialize_domain_tracking():
     """Initialize thread-safe tracking for each domain"""
+    if IS_CHECK:
+        for site in TARGET_SITES:
+            try:
+                _validator_cache.update(get_validators_for_domain(site['domain']))
+            except Exception as e:
+                logger.warning(f"Could not load validators for {site['domain']}: {e}")
     for site in TARGET_SITES:
         domain = site['domain']
-        visited_sets[domain] = set()
-        visited_locks[domain] = threading.Lock()
+        if VISITED_BACKEND == 'sqlite':
+            visited_sets[domain] = SqliteVisitedSet(domain, load_progress(domain))
+        elif VISITED_BACKEND == 'bloom':
+            visited_sets[domain] = BloomVisitedSet(domain, load_progress(domain))
+        else:
+            visited_sets[domain] = ShardedVisitedSet(load_progress(domain))
+
+@lru_cache(maxsize=None)
+def _domain_pattern(domain):
+    """Compiled validator for one domain: http(s) scheme, that domain or a
+    subdomain of it, nothing else. One C-level match replaces the former
+    urlparse + endswith + scheme checks per link."""
+    return re.compile(
+        r'^https?://(?:[\w.-]+\.)?' + re.escape(domain) + r'(?:[/?#]|$)'
+    )
 
+@lru_cache(maxsize=200_000)
 def is_valid_url(url, domain):
-    parsed = urlparse(url)
-    if parsed.scheme not in ("http", "https"):
-        return False
-    if not parsed.netloc.endswith(domain):
-        return False
-    if url.startswith("mailto:") or url.startswith("javascript:"):
-        return False
-    return True
+    # Cached: links repeat heavily across pages of a site and this runs
+    # once per extracted link plus once per dequeued URL
+    return _domain_pattern(domain).match(url) is not None
+
+# Compiled fast path: _fast.pyx ports the validator to plain C string
+# scans (built via `python setup.py build_ext --inplace`)
+try:
+    from ._fast import is_valid_url as _c_is_valid_url
+    is_valid_url = lru_cache(maxsize=200_000)(_c_is_valid_url)
+except ImportError:
+    pass
+
+@lru_cache(maxsize=128)
+def parse_content_type(content_type):
+    """Split a raw Content-Type header into (mime, charset_or_None).
+
+    Cached on the raw header string: servers emit only a handful of
+    distinct values, so after warm-up the repeated lower()/split string
+    work collapses to one dict hit per response.
+    """
+    if not content_type:
+        return '', None
+    mime, _, params = content_type.partition(';')
+    charset = None
+    params_lower = params.lower()
+    charset_at = params_lower.find('charset=')
+    if charset_at != -1:
+        charset = params[charset_at + 8:].split(';')[0].strip().strip('"\'') or None
+    return mime.strip().lower(), charset
+
+def accept_url(url, domain):
+    """Normalize and validate in one step; returns the normalized URL or
+    None if it should be skipped. Both halves are cached, so a repeated
+    link costs two dict hits."""
+    normalized = normalize_url(url)
+    if not normalized or not is_valid_url(normalized, domain):
+        return None
+    return normalized
+
+# Byte-order marks checked before any statistical detection. The
+# BOM-consuming codecs (utf-16/utf-32 pick the endianness from the BOM,
+# like utf-8-sig) are used so the mark never leaks into the decoded
+# text as a literal U+FEFF.
+_BOM_ENCODINGS = (
+    (b'\xef\xbb\xbf', 'utf-8-sig'),
+    (b'\xff\xfe\x00\x00', 'utf-32'),
+    (b'\x00\x00\xfe\xff', 'utf-32'),
+    (b'\xff\xfe', 'utf-16'),
+    (b'\xfe\xff', 'utf-16'),
+)
+_BOM_PREFIXES = tuple(bom for bom, _ in _BOM_ENCODINGS)
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
 
 def detect_encoding(content):
-    """Detect the encoding of content using chardet"""
+    """Detect the encoding of content from BOM, meta charset or chardet.
+
+    chardet is pure Python and scans the whole buffer, so it is only used
+    as a last resort and only on a bounded prefix. Most pages declare
+    their encoding in a BOM or a <meta charset> tag within the first
+    couple of kilobytes, which the cheap checks here catch.
+    """
+    for bom, bom_encoding in _BOM_ENCODINGS:
+        if content.startswith(bom):
+            return bom_encoding
+    match = _META_CHARSET_RE.search(content[:2048])
+    if match:
+        return match.group(1).decode('ascii', errors='replace')
+    if cchardet is not None:
+        try:
+            result = cchardet.detect(content[:8192])
+            if result['encoding']:
+                return result['encoding']
+        except Exception:
+            pass
+    if _charset_normalizer_from_bytes is not None:
+        try:
+            best = _charset_normalizer_from_bytes(content[:8192]).best()
+            if best and best.encoding:
+                return best.encoding
+        except Exception:
+            pass
+    # Incremental detection: feed 8 KB at a time and stop as soon as the
+    # detector is confident, bounded at 64 KB either way — chardet's
+    # whole-buffer detect() on a megabyte body is O(n) pure Python
     try:
-        result = chardet.detect(content)
-        return result['encoding'] if result['encoding'] else 'utf-8'
+        detector = chardet.UniversalDetector()
+        for offset in range(0, min(len(content), 65536), 8192):
+            detector.feed(content[offset:offset + 8192])
+            if detector.done:
+                break
+        detector.close()
+        return detector.result['encoding'] or 'utf-8'
     except:
         return 'utf-8'
 
@@ -63,6 +704,16 @@ def decode_content(content, encoding=None):
         except (UnicodeDecodeError, LookupError):
             pass
     
+    # Most pages are UTF-8: a strict decode either succeeds — skipping
+    # detection entirely — or fails fast at the first non-UTF-8 byte.
+    # BOM'd content goes straight to detection so UTF-16/32 and the
+    # utf-8-sig marker are honoured.
+    if not content.startswith(_BOM_PREFIXES):
+        try:
+            return content.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+
     # Try to detect encoding
     detected_encoding = detect_encoding(content)
     try:
@@ -87,218 +738,385 @@ def decode_content(content, encoding=None):
         except:
             return "[Content could not be decoded]"
 
+# Subtrees none of the extractors ever read, decomposed after the parse.
+# (A blocklist SoupStrainer cannot do this at parse time: the strainer
+# keeps the whole subtree of any matching tag, and <html> always
+# matches.) Parse cost is unchanged; what this buys is smaller trees for
+# the find_all passes in the title/breadcrumb/link extractors.
+_PARSE_SKIP_TAGS = ('script', 'style', 'noscript', 'svg', 'iframe', 'template')
+
 def create_soup(html, content_type=None):
     """Create BeautifulSoup object with appropriate parser based on content type"""
-    if not html or len(html.strip()) == 0:
+    if not html or html.isspace():
         return None
-    
-    # Check if content looks like XML/XHTML
-    html_lower = html.lower().strip()
-    if content_type and 'xml' in content_type.lower():
-        try:
-            return BeautifulSoup(html, "xml")
-        except:
-            pass
-    
-    # Check for XML-like content
-    if html_lower.startswith('<?xml') or html_lower.startswith('<rss') or html_lower.startswith('<feed'):
+
+    # XML sniff on a 32-char prefix only: the old full-body lower()/strip()
+    # allocated a second megabyte-scale string per page just to check how
+    # the document starts
+    head = html[:32].lstrip().lower()
+    is_xml = (
+        'xml' in parse_content_type(content_type)[0]
+        or head.startswith(('<?xml', '<rss', '<feed'))
+    )
+    if is_xml:
+        # "lxml-xml" is what the "xml" alias resolves to; name it
+        # explicitly so the lxml dependency is visible at the call site
         try:
-            return BeautifulSoup(html, "xml")
+            return BeautifulSoup(html, "lxml-xml")
         except:
             pass
-    
-    # Default to HTML parser
+
+    # Prefer the C-backed lxml parser; fall back to the pure-Python
+    # html.parser if lxml is unavailable or chokes on the input
+    try:
+        return BeautifulSoup(html, "lxml")
+    except Exception:
+        pass
     try:
         return BeautifulSoup(html, "html.parser")
     except Exception as e:
         logger.warning(f"Failed to parse HTML: {e}")
         return None
 
-def extract_links(html, base_url, content_type=None):
+def parse_page(html, content_type=None):
+    """
+    Parse a page exactly once, returning a selectolax tree or a bs4 soup.
+
+    Every crawl path — the DFS stack, the BFS queue, the shared worker
+    pool and the async core — parses through here and shares the returned
+    tree between extract_title, extract_breadcrumb and extract_links, so
+    the HTML is never parsed a second time for link extraction. XML
+    content (and installs without selectolax) gets a BeautifulSoup tree
+    from create_soup.
+    """
+    if not html or len(html.strip()) == 0:
+        return None
+    is_xml = 'xml' in parse_content_type(content_type)[0]
+    if SelectolaxParser is not None and not is_xml:
+        try:
+            return SelectolaxParser(html)
+        except Exception:
+            pass
+    # The bs4 fallback never needs script/style/svg subtrees; shed them
+    # once here so every extractor pass walks a smaller tree
     soup = create_soup(html, content_type)
-    if not soup:
+    if soup is not None and not is_xml:
+        for node in soup.find_all(_PARSE_SKIP_TAGS):
+            node.decompose()
+    return soup
+
+# Schemes that can never yield a crawlable page; rejected on the raw
+# href, before any join/normalize/validate work runs
+_SKIP_HREF_PREFIXES = ('mailto:', 'javascript:', 'tel:', 'data:')
+
+class _HrefTarget:
+    """SAX-style lxml target that collects anchor hrefs, nothing else.
+
+    The parser calls start() per element and never builds a tree, so a
+    link-only pass allocates one list of strings instead of a DOM node
+    per tag.
+    """
+    __slots__ = ('hrefs',)
+
+    def __init__(self):
+        self.hrefs = []
+
+    def start(self, tag, attrib):
+        if tag == 'a':
+            href = attrib.get('href')
+            if href:
+                self.hrefs.append(href)
+
+    def close(self):
+        return self.hrefs
+
+def extract_links_lxml(html, base_url):
+    """Extract normalized anchor targets without building a DOM.
+
+    lxml tokenizes in C and only the <a href> values surface into
+    Python; the per-anchor work left is the join and the cached
+    normalize call.
+    """
+    try:
+        parser = lxml.etree.HTMLParser(target=_HrefTarget(), collect_ids=False)
+        hrefs = lxml.etree.fromstring(html, parser)
+    except Exception:
         return set()
-    
     links = set()
-    for a in soup.find_all("a", href=True):
-        href = urljoin(base_url, a["href"])
-        normalized = normalize_url(href)
+    _norm = normalize_url
+    _join = urljoin
+    _skip = should_skip_url
+    add = links.add
+    for href in hrefs:
+        if href[0] == '#' or href.startswith(_SKIP_HREF_PREFIXES) or _skip(href):
+            continue
+        normalized = _norm(_join(base_url, href))
         if normalized:
-            links.add(normalized)
+            add(normalized)
     return links
 
-def extract_title(soup):
-    """Extract title from soup object with fallbacks"""
-    if not soup:
+def extract_links(tree, base_url, html=None):
+    """Extract normalized same-page links from an already-parsed tree.
+
+    When the shared tree is a BeautifulSoup fallback and the raw html is
+    provided, link extraction is handed to extract_links_lxml instead of
+    walking the soup anchor by anchor in Python.
+    """
+    if not tree:
+        return set()
+
+    # Local aliases keep the per-anchor loop free of global/attribute
+    # lookups; nav and footer links repeat on every page, so skipping
+    # fragment-only, non-http-scheme and excluded-extension
+    # hrefs before the join/normalize pays off proportionally to anchor
+    # count — rejected hrefs never reach urljoin or the caches at all.
+    links = set()
+    _norm = normalize_url
+    _join = urljoin
+    _skip = should_skip_url
+    add = links.add
+    if SelectolaxParser is not None and isinstance(tree, SelectolaxParser):
+        for node in tree.css('a[href]'):
+            href = node.attributes.get('href')
+            if not href or href[0] == '#' or href.startswith(_SKIP_HREF_PREFIXES) or _skip(href):
+                continue
+            normalized = _norm(_join(base_url, href))
+            if normalized:
+                add(normalized)
+        return links
+
+    if html is not None:
+        return extract_links_lxml(html, base_url)
+
+    for a in tree.find_all("a", href=True):
+        href = a["href"]
+        if not href or href[0] == '#' or href.startswith(_SKIP_HREF_PREFIXES) or _skip(href):
+            continue
+        normalized = _norm(_join(base_url, href))
+        if normalized:
+            add(normalized)
+    return links
+
+def extract_title(tree):
+    """Extract title from a parsed tree with fallbacks"""
+    if not tree:
         return None
-    
+
+    if SelectolaxParser is not None and isinstance(tree, SelectolaxParser):
+        # Try title tag first, then h1, then meta title
+        for selector in ('title', 'h1'):
+            node = tree.css_first(selector)
+            if node:
+                text = node.text(strip=True)
+                if text:
+                    return text
+        meta_title = tree.css_first('meta[name="title"]')
+        if meta_title:
+            content = meta_title.attributes.get('content')
+            if content:
+                return content.strip()
+        return None
+
     # Try title tag first
-    title_tag = soup.find('title')
+    title_tag = tree.find('title')
     if title_tag and title_tag.string:
         return title_tag.string.strip()
-    
+
     # Try h1 tag
-    h1_tag = soup.find('h1')
+    h1_tag = tree.find('h1')
     if h1_tag and h1_tag.string:
         return h1_tag.string.strip()
-    
+
     # Try meta title
-    meta_title = soup.find('meta', attrs={'name': 'title'})
+    meta_title = tree.find('meta', attrs={'name': 'title'})
     if meta_title and meta_title.get('content'):
         return meta_title['content'].strip()
-    
+
     return None
 
 def get_thread_session():
-    if not hasattr(thread_local, "session"):
-        thread_local.session = requests.Session()
-    return thread_local.session
+    """Return the process-wide shared session (name kept for call sites)"""
+    return _shared_session
 
-def crawl_page(url, domain, parent_id=None, depth=0, max_depth=5):
-    """DFS implementation - original recursive crawler"""
-    normalized_url = normalize_url(url)
-    if not normalized_url or not is_valid_url(normalized_url, domain):
-        return
-    
-    # Thread-safe check for visited URLs
-    with visited_locks[domain]:
-        if normalized_url in visited_sets[domain]:
-            return
-        visited_sets[domain].add(normalized_url)
-    
-    logger.info(f"Crawling [{domain}] (DFS depth {depth}): {normalized_url}")
+def is_parseable_content_type(content_type):
+    """True when a body with this Content-Type is worth downloading"""
+    if not content_type:
+        return True  # some servers omit the header; assume HTML
+    mime = parse_content_type(content_type)[0]
+    return 'html' in mime or 'xml' in mime or mime.startswith('text/')
+
+def fetch_page(url, send_validators=True):
+    """Fetch one URL with streaming; returns (status_code, content_type, html).
+
+    The body is only read when the Content-Type looks parseable, so binary
+    assets are closed after the headers instead of downloaded, decoded and
+    handed to the parser. Bodies over MAX_CONTENT_BYTES are skipped when
+    the server declares the length and truncated at the cap otherwise.
+    With send_validators, known validators turn re-fetches into
+    conditional requests and an unchanged page answers 304 with no body
+    at all — callers that still need the page's links must pass False,
+    because a 304 yields nothing to extract them from.
+    """
+    headers = None
+    validators = _validator_cache.get(url) if IS_CHECK and send_validators else None
+    if validators:
+        headers = {}
+        if validators[0]:
+            headers['If-None-Match'] = validators[0]
+        if validators[1]:
+            headers['If-Modified-Since'] = validators[1]
+    resp = get_thread_session().get(url, timeout=10, stream=True, headers=headers)
     try:
-        session = get_thread_session()
-        resp = session.get(normalized_url, timeout=10)
         status_code = resp.status_code
-        
-        if resp.status_code != 200:
-            html = ""
-            content_type = resp.headers.get('content-type', '')
-        else:
-            # Handle encoding properly
-            content_type = resp.headers.get('content-type', '')
-            
-            # Try to get encoding from content-type header
-            encoding = None
-            if 'charset=' in content_type.lower():
-                try:
-                    encoding = content_type.split('charset=')[-1].split(';')[0].strip()
-                except:
-                    pass
-            
-            # Decode content with proper encoding handling
-            html = decode_content(resp.content, encoding)
-            
+        content_type = resp.headers.get('content-type', '')
+        if status_code == 200:
+            etag = resp.headers.get('etag')
+            last_modified = resp.headers.get('last-modified')
+            if etag or last_modified:
+                _validator_cache[url] = (etag, last_modified)
+        if status_code != 200 or not is_parseable_content_type(content_type):
+            return status_code, content_type, ""
+
+        declared_length = resp.headers.get('content-length')
+        if declared_length:
+            try:
+                if int(declared_length) > MAX_CONTENT_BYTES:
+                    logger.warning(f"Skipping oversized body ({declared_length} bytes) at {url}")
+                    return status_code, content_type, ""
+            except ValueError:
+                pass
+
+        chunks = []
+        total = 0
+        for chunk in resp.iter_content(chunk_size=65536):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= MAX_CONTENT_BYTES:
+                logger.warning(f"Truncating body at {MAX_CONTENT_BYTES} bytes for {url}")
+                break
+        body = b''.join(chunks)
+
+        # The header's own charset, when declared; None lets the detection
+        # chain in decode_content run for undeclared pages (requests'
+        # resp.encoding is not used because it defaults text/* to
+        # ISO-8859-1 even without a declared charset)
+        encoding = parse_content_type(content_type)[1]
+        return status_code, content_type, decode_content(body, encoding)
+    finally:
+        resp.close()
+
+def _crawl_page_once(url, domain, parent_id, depth, max_depth):
+    """Fetch, parse and store one page; returns (case_id, links) or None.
+
+    Shared by the per-site DFS loop and the pooled workers. The links
+    are empty when depth has reached max_depth, so callers only enqueue.
+    """
+    normalized_url = accept_url(url, domain)
+    if not normalized_url:
+        return None
+
+    # Thread-safe check-and-mark; only the shard for this URL is locked
+    if not visited_sets[domain].add_if_new(normalized_url):
+        return None
+    visited_count = len(visited_sets[domain])
+
+    # Periodically persist progress so interrupted crawls can resume
+    # (the sqlite backend is already on disk and stores only hashes)
+    if visited_count % SAVE_INTERVAL == 0:
+        persist_visited(domain)
+
+    logger.info(f"Crawling [{domain}] (depth {depth}): {normalized_url}")
+    get_rate_limiter(domain).wait()
+    # Conditional requests only at max depth: an inner page's links are
+    # what the traversal runs on, and a 304 carries no body to extract
+    # them from — short-circuiting there would end the crawl at the
+    # first unchanged page. Leaves never have their links read, so only
+    # they can safely skip the download on a 304.
+    at_leaf_depth = depth >= max_depth
+    try:
+        status_code, content_type, html = fetch_page(
+            normalized_url, send_validators=at_leaf_depth)
     except Exception as e:
         logger.error(f"Error fetching {normalized_url}: {e}")
-        return
-    
-    # Create soup with appropriate parser
-    soup = create_soup(html, content_type)
-    if not soup:
+        return None
+
+    if status_code == 304:
+        logger.info(f"Not modified, skipping parse: {normalized_url}")
+        return None
+
+    # Parse once; the tree is reused for title, breadcrumb and links
+    tree = parse_page(html, content_type)
+    if not tree:
         logger.warning(f"Could not parse content from {normalized_url}")
-        return
-    
+        return None
+
     # Extract title with fallbacks
-    title = extract_title(soup)
+    title = extract_title(tree)
     if not title:
         title = normalized_url
-    
-    path_url = extract_breadcrumb(soup, normalized_url)
-    session = get_session()
-    try:
-        case_id = insert_or_update_case(session, normalized_url, parent_id, path_url, title, status_code, IS_CHECK)
-    except Exception as e:
-        logger.error(f"DB error for {normalized_url}: {e}")
-        session.rollback()
-        return
-    finally:
-        session.close()
-    
-    if depth >= max_depth:
-        return
-    
-    links = extract_links(html, normalized_url, content_type)
-    time.sleep(CRAWL_DELAY)
-    
-    # Only crawl links that belong to the same domain
-    for link in links:
-        if is_valid_url(link, domain):
-            crawl_page(link, domain, parent_id=case_id, depth=depth+1, max_depth=max_depth)
+
+    path_url = extract_breadcrumb(tree, normalized_url)
+    etag, last_modified = _validator_cache.get(normalized_url, (None, None))
+    # Queue the row for the batch writer; the id comes back immediately
+    case_id = get_case_writer().put(normalized_url, parent_id, path_url, title, status_code,
+                                    etag=etag, last_modified=last_modified)
+    if case_id is None:
+        return None
+
+    if at_leaf_depth:
+        return case_id, ()
+    return case_id, extract_links(tree, normalized_url, html)
+
+def crawl_page(url, domain, parent_id=None, depth=0, max_depth=5):
+    """DFS implementation - iterative crawler using an explicit stack.
+
+    LIFO pops keep the original depth-first order without a Python frame
+    per page, so deep crawls cannot hit the recursion limit.
+    """
+    stack = [(url, parent_id, depth)]  # (url, parent_id, depth)
+
+    while stack:
+        url, parent_id, depth = stack.pop()
+        result = _crawl_page_once(url, domain, parent_id, depth, max_depth)
+        if result is None:
+            continue
+        case_id, links = result
+
+        # Push valid links to be crawled depth-first
+        stack.extend(
+            (link, case_id, depth + 1)
+            for link in links
+            if is_valid_url(link, domain) and should_fetch(link, domain)
+        )
 
 def crawl_page_bfs(start_url, domain, max_depth=5):
-    """BFS implementation - iterative crawler using queue"""
+    """BFS implementation - iterative crawler using queue.
+
+    Shares _crawl_page_once with the DFS and pooled paths, so the BFS
+    loop is only the queue discipline; the domain's tracked visited set
+    is created here when the crawl was started without
+    initialize_domain_tracking().
+    """
+    if domain not in visited_sets:
+        visited_sets[domain] = ShardedVisitedSet(load_progress(domain))
     queue = deque([(start_url, None, 0)])  # (url, parent_id, depth)
-    visited = set()
-    
+
     while queue:
         url, parent_id, depth = queue.popleft()
-        
-        normalized_url = normalize_url(url)
-        if not normalized_url or not is_valid_url(normalized_url, domain):
+        result = _crawl_page_once(url, domain, parent_id, depth, max_depth)
+        if result is None:
             continue
-            
-        # Check if already visited
-        if normalized_url in visited:
-            continue
-        visited.add(normalized_url)
-        
-        logger.info(f"Crawling [{domain}] (BFS depth {depth}): {normalized_url}")
-        
-        try:
-            session = get_thread_session()
-            resp = session.get(normalized_url, timeout=10)
-            status_code = resp.status_code
-            
-            if resp.status_code != 200:
-                html = ""
-                content_type = resp.headers.get('content-type', '')
-            else:
-                content_type = resp.headers.get('content-type', '')
-                encoding = None
-                if 'charset=' in content_type.lower():
-                    try:
-                        encoding = content_type.split('charset=')[-1].split(';')[0].strip()
-                    except:
-                        pass
-                html = decode_content(resp.content, encoding)
-                
-        except Exception as e:
-            logger.error(f"Error fetching {normalized_url}: {e}")
-            continue
-        
-        # Create soup with appropriate parser
-        soup = create_soup(html, content_type)
-        if not soup:
-            logger.warning(f"Could not parse content from {normalized_url}")
-            continue
-        
-        # Extract title with fallbacks
-        title = extract_title(soup)
-        if not title:
-            title = normalized_url
-        
-        path_url = extract_breadcrumb(soup, normalized_url)
-        db_session = get_session()
-        try:
-            case_id = insert_or_update_case(db_session, normalized_url, parent_id, path_url, title, status_code, IS_CHECK)
-        except Exception as e:
-            logger.error(f"DB error for {normalized_url}: {e}")
-            db_session.rollback()
-            continue
-        finally:
-            db_session.close()
-        
-        # If we haven't reached max depth, extract links and add to queue
-        if depth < max_depth:
-            links = extract_links(html, normalized_url, content_type)
-            time.sleep(CRAWL_DELAY)
-            
-            # Add valid links to queue for next depth level
-            for link in links:
-                if is_valid_url(link, domain):
-                    queue.append((link, case_id, depth + 1))
+        case_id, links = result
+
+        # Add valid links to queue for next depth level
+        queue.extend(
+            (link, case_id, depth + 1)
+            for link in links
+            if is_valid_url(link, domain) and should_fetch(link, domain)
+        )
+
+    # Persist final progress for this domain
+    persist_visited(domain)
 
 def crawl_site(site_config, max_depth=5, use_bfs=False):
     """Crawl a single site using either DFS or BFS"""
@@ -306,39 +1124,95 @@ def crawl_site(site_config, max_depth=5, use_bfs=False):
     start_url = site_config['start_url']
     site_name = site_config['name']
     
+    _install_dns_cache()
     logger.info(f"Starting {'BFS' if use_bfs else 'DFS'} crawl for {site_name} ({domain})")
     try:
         if use_bfs:
             crawl_page_bfs(start_url, domain, max_depth)
         else:
             crawl_page(start_url, domain, None, 0, max_depth)
+            persist_visited(domain)
         logger.info(f"Completed {'BFS' if use_bfs else 'DFS'} crawl for {site_name}")
     except Exception as e:
         logger.error(f"Error crawling {site_name}: {e}")
 
+# One executor for the whole process, created on first crawl and reused
+# by later runs instead of spawning fresh threads each time
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def _get_worker_pool():
+    """Return the process-wide crawl executor, creating it lazily"""
+    global _worker_pool
+    if _worker_pool is None:
+        with _worker_pool_lock:
+            if _worker_pool is None:
+                _worker_pool = ThreadPoolExecutor(
+                    max_workers=MAX_THREADS, thread_name_prefix='crawl')
+    return _worker_pool
+
+def _pool_worker(work_queue, max_depth):
+    """Work-stealing crawl worker: pulls pages off the shared queue
+    regardless of site, enqueueing children back onto it. Workers are
+    spawned once per crawl and live until the sentinel — never per URL,
+    so there is no thread create/join cost on the hot path. A None item
+    is the shutdown sentinel."""
+    while True:
+        item = work_queue.get()
+        if item is None:
+            work_queue.task_done()
+            return
+        url, domain, parent_id, depth = item
+        try:
+            result = _crawl_page_once(url, domain, parent_id, depth, max_depth)
+            if result is not None:
+                case_id, links = result
+                for link in links:
+                    if is_valid_url(link, domain) and should_fetch(link, domain):
+                        work_queue.put((link, domain, case_id, depth + 1))
+        except Exception as e:
+            logger.error(f"Worker error for {url}: {e}")
+        finally:
+            work_queue.task_done()
+
 def start_crawl(max_depth=5, sites=None, use_bfs=False):
-    """Start crawling all sites using multiple threads with DFS or BFS"""
+    """Start crawling all sites with one shared work-stealing pool.
+
+    The former thread-per-site model left workers idle once their site
+    ran dry while the largest site's thread ground on alone. All sites
+    now seed a single queue drained by MAX_THREADS workers, so every
+    worker stays busy until the whole crawl is done. A FIFO queue gives
+    breadth-first order across the pool; a LIFO queue gives depth-first.
+    """
+    _install_dns_cache()
     initialize_domain_tracking()
-    
+
     if sites is None:
         sites = TARGET_SITES
-    logger.info(f"Starting multi-site {'BFS' if use_bfs else 'DFS'} crawl with {MAX_THREADS} threads")
+    logger.info(f"Starting multi-site {'BFS' if use_bfs else 'DFS'} crawl with {MAX_THREADS} workers")
     logger.info(f"Target sites: {[site['name'] for site in sites]}")
-    
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        # Submit each site to be crawled in its own thread
-        futures = [
-            executor.submit(crawl_site, site, max_depth, use_bfs) 
-            for site in sites
-        ]
-        
-        # Wait for all sites to complete
-        for future in as_completed(futures):
-            try:
-                future.result()
-            except Exception as e:
-                logger.error(f"Thread execution error: {e}")
-    
+
+    work_queue = queue.Queue() if use_bfs else queue.LifoQueue()
+    for site in sites:
+        work_queue.put((site['start_url'], site['domain'], None, 0))
+
+    pool = _get_worker_pool()
+    workers = [pool.submit(_pool_worker, work_queue, max_depth) for _ in range(MAX_THREADS)]
+
+    # join() returns once every queued page (and its children) is done;
+    # only then are the shutdown sentinels posted
+    work_queue.join()
+    for _ in workers:
+        work_queue.put(None)
+    for worker in workers:
+        worker.result()
+
+    for site in sites:
+        domain = site['domain']
+        persist_visited(domain)
+
+    # Flush any rows still queued in the batch writer
+    close_case_writer()
     logger.info(f"Multi-site {'BFS' if use_bfs else 'DFS'} crawl completed")
 
 # Convenience functions for specific traversal methods
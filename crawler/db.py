@@ -1,36 +1,130 @@
-from sqlalchemy import create_engine, Column, String, Text, TIMESTAMP, Integer, ForeignKey, func
+import logging
+import queue
+import sys
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import create_engine, Column, String, Text, TIMESTAMP, Integer, ForeignKey, func, text
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import uuid
-from .config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+from .config import (
+    DB_BATCH_SIZE,
+    DB_FLUSH_INTERVAL,
+    DB_HOST,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_PORT,
+    DB_USER,
+    MAX_THREADS,
+)
 from .utils import normalize_url
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
 class CourtCase(Base):
     __tablename__ = 'courtcases'
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     url = Column(String(2048), unique=True, nullable=False)
-    parent_id = Column(UUID(as_uuid=True), ForeignKey('courtcases.id'), nullable=True)
+    # Indexed: parent lookups and the with_parent stats count walk this
+    # column, and PostgreSQL does not index FK columns on its own
+    parent_id = Column(UUID(as_uuid=True), ForeignKey('courtcases.id'), nullable=True, index=True)
     path_url = Column(Text)
     title = Column(Text)
     crawled_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
     status_code = Column(Integer)
+    # HTTP validators from the last fetch, for conditional re-crawls
+    etag = Column(String(256))
+    last_modified = Column(String(64))
 
 # Database URL
 DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Pool sized to the crawl concurrency so helper queries never wait on a
+# checkout while the writer thread holds a connection; recycle well under
+# typical server/firewall idle timeouts
+engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=max(5, MAX_THREADS),
+    max_overflow=MAX_THREADS,
+    pool_recycle=1800,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    # create_all never alters a table that already exists, and there is
+    # no migration tooling here; add the validator columns idempotently
+    # so deployments that predate them keep flushing (the batch upsert
+    # references both on every write)
+    with engine.begin() as conn:
+        conn.execute(text(
+            'ALTER TABLE courtcases ADD COLUMN IF NOT EXISTS etag VARCHAR(256)'))
+        conn.execute(text(
+            'ALTER TABLE courtcases ADD COLUMN IF NOT EXISTS last_modified VARCHAR(64)'))
 
 def get_session():
     return SessionLocal()
 
+def get_existing_urls_for_domain(domain):
+    """Return the set of URLs already stored in the database for a domain"""
+    session = get_session()
+    try:
+        rows = session.query(CourtCase.url).filter(CourtCase.url.like(f'%{domain}%')).all()
+        # Intern so URLs that also appear in the progress set share storage
+        # and set operations between the two can compare by pointer first
+        return {sys.intern(row[0]) for row in rows}
+    finally:
+        session.close()
+
+def get_existing_urls_iter(domain, batch_size=10000):
+    """Stream the URLs stored for a domain without materializing the full set"""
+    session = get_session()
+    try:
+        query = session.query(CourtCase.url).filter(CourtCase.url.like(f'%{domain}%'))
+        for row in query.yield_per(batch_size):
+            yield row[0]
+    finally:
+        session.close()
+
+def get_validators_for_domain(domain):
+    """Map of url -> (etag, last_modified) for rows that stored either"""
+    session = get_session()
+    try:
+        rows = session.query(
+            CourtCase.url, CourtCase.etag, CourtCase.last_modified
+        ).filter(
+            CourtCase.url.like(f'%{domain}%'),
+            CourtCase.etag.isnot(None) | CourtCase.last_modified.isnot(None),
+        )
+        return {url: (etag, last_modified) for url, etag, last_modified in rows}
+    finally:
+        session.close()
+
+def get_domain_stats_from_db(domain):
+    """Return summary statistics for a domain's rows in the database"""
+    session = get_session()
+    try:
+        query = session.query(CourtCase).filter(CourtCase.url.like(f'%{domain}%'))
+        total = query.count()
+        ok = query.filter(CourtCase.status_code == 200).count()
+        with_title = query.filter(CourtCase.title.isnot(None)).count()
+        with_parent = query.filter(CourtCase.parent_id.isnot(None)).count()
+        return {
+            'total_urls': total,
+            'status_200': ok,
+            'with_title': with_title,
+            'with_parent': with_parent,
+        }
+    finally:
+        session.close()
+
 def get_case_by_url(session, url):
     norm_url = normalize_url(url)
     if not norm_url:
@@ -62,4 +156,214 @@ def insert_or_update_case(session, url, parent_id, path_url, title, status_code,
     )
     session.add(new_case)
     session.commit()
-    return new_case.id 
\ No newline at end of file
+    return new_case.id
+
+class BatchCaseWriter:
+    """Coalesce per-page rows into batched transactions on one writer thread.
+
+    Storing a page used to cost its own SELECT plus COMMIT; on a fast crawl
+    the commit/fsync path dominates. Workers call put() and get the row's id
+    back immediately — ids are client-side UUIDs, so no round-trip is needed
+    — while a background thread drains the queue and flushes up to
+    batch_size rows per transaction.
+
+    URLs already present keep their stored id: put() hands out a
+    speculative id, and the flush remaps it (and any parent_id that pointed
+    at it) to the existing row's id before writing.
+    """
+
+    # Remap entries are only useful while a descendant may still arrive;
+    # past this many the oldest are dropped (a straggler child then
+    # lands orphaned through the per-row fallback instead of erroring)
+    _ID_MAP_MAX = 200_000
+
+    def __init__(self, batch_size=DB_BATCH_SIZE, flush_interval=DB_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        # speculative id -> existing id, writer thread only; ordered so
+        # the oldest entries can be evicted once past _ID_MAP_MAX
+        self._id_map = OrderedDict()
+        # ids of rows that could not be written even alone; children
+        # referencing them are orphaned rather than failing their batch
+        self._failed_ids = set()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='case-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, url, parent_id, path_url, title, status_code,
+            etag=None, last_modified=None):
+        """Queue one row for writing; returns its id without touching the DB"""
+        norm_url = normalize_url(url)
+        if not norm_url:
+            return None
+        case_id = uuid.uuid4()
+        self._queue.put({
+            'id': case_id,
+            'url': norm_url,
+            'parent_id': parent_id,
+            'path_url': path_url,
+            'title': title,
+            'status_code': status_code,
+            'etag': etag,
+            'last_modified': last_modified,
+        })
+        return case_id
+
+    def close(self):
+        """Flush any queued rows and stop the writer thread"""
+        self._closed.set()
+        self._thread.join()
+
+    def _drain(self):
+        rows = []
+        try:
+            rows.append(self._queue.get(timeout=self.flush_interval))
+            while len(rows) < self.batch_size:
+                rows.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _run(self):
+        while not (self._closed.is_set() and self._queue.empty()):
+            rows = self._drain()
+            if not rows:
+                continue
+            try:
+                self._flush(rows)
+            except Exception as e:
+                logger.error(
+                    f"Batch write of {len(rows)} rows failed: {e}; retrying rows individually")
+                self._flush_fallback(rows)
+
+    def _flush_fallback(self, rows):
+        """Land what can land after a failed batch.
+
+        One data-dependent error (an oversize URL, a dangling parent)
+        must cost that row alone, not the batch and — through the
+        missing id remaps — every later batch carrying a descendant.
+        Each row is retried by itself; a row that still fails is retried
+        once more orphaned, so an unresolvable parent_id loses the link
+        but keeps the row. Only then is the row dropped, its id recorded
+        in _failed_ids so descendants are orphaned instead of erroring.
+        """
+        for row in rows:
+            try:
+                self._flush([row])
+                continue
+            except Exception:
+                pass
+            if row['parent_id'] is not None:
+                try:
+                    self._flush([dict(row, parent_id=None)])
+                    continue
+                except Exception:
+                    pass
+            logger.error(f"Dropping row for {row['url']} after failed writes")
+            self._failed_ids.add(row['id'])
+
+    def _flush(self, rows):
+        session = get_session()
+        try:
+            # Resolve conflicts before building the statement: a URL that
+            # already exists becomes an ON CONFLICT update, so its
+            # speculative id is never inserted — a child in this same
+            # batch would then reference a missing row and the whole
+            # statement would fail the FK check, dropping every row.
+            # One indexed SELECT per batch buys that correctness.
+            existing_ids = dict(
+                session.query(CourtCase.url, CourtCase.id).filter(
+                    CourtCase.url.in_({row['url'] for row in rows})
+                )
+            )
+            for row in rows:
+                existing_id = existing_ids.get(row['url'])
+                if existing_id is not None and existing_id != row['id']:
+                    self._id_map[row['id']] = existing_id
+                    row['id'] = existing_id
+
+            # Parents flushed in an earlier batch (or resolved just above)
+            # may have been remapped to an existing row's id; follow the
+            # map before writing children. A parent that could never be
+            # written cannot be referenced — orphan its children.
+            for row in rows:
+                parent_id = row['parent_id']
+                if parent_id is not None:
+                    parent_id = self._id_map.get(parent_id, parent_id)
+                    row['parent_id'] = None if parent_id in self._failed_ids else parent_id
+
+            # One upsert replaces the former SELECT + bulk insert + bulk
+            # update round-trips. ON CONFLICT cannot touch the same row
+            # twice in a statement, so repeats of a URL within the batch
+            # fold into its first row (last write wins for the content)
+            by_url = {}
+            duplicates = []
+            for row in rows:
+                first = by_url.get(row['url'])
+                if first is None:
+                    by_url[row['url']] = row
+                else:
+                    duplicates.append((row['id'], row['url']))
+                    first['path_url'] = row['path_url']
+                    first['title'] = row['title']
+                    first['status_code'] = row['status_code']
+                    first['etag'] = row['etag']
+                    first['last_modified'] = row['last_modified']
+
+            statement = pg_insert(CourtCase).values(list(by_url.values()))
+            statement = statement.on_conflict_do_update(
+                index_elements=['url'],
+                set_={
+                    'path_url': statement.excluded.path_url,
+                    'title': statement.excluded.title,
+                    'status_code': statement.excluded.status_code,
+                    # Never downgrade stored validators to NULL: a fetch
+                    # that did not produce them (error status, server
+                    # without validators, async path pre-load) should
+                    # leave the ones an earlier crawl saved intact
+                    'etag': func.coalesce(statement.excluded.etag, CourtCase.etag),
+                    'last_modified': func.coalesce(
+                        statement.excluded.last_modified, CourtCase.last_modified),
+                    'updated_at': func.now(),
+                },
+            ).returning(CourtCase.url, CourtCase.id)
+
+            # RETURNING hands back the existing id on conflict; remap any
+            # speculative ids (and batch duplicates) to the final row ids
+            final_ids = dict(session.execute(statement))
+            for url, row in by_url.items():
+                final_id = final_ids[url]
+                if final_id != row['id']:
+                    self._id_map[row['id']] = final_id
+            for speculative_id, url in duplicates:
+                self._id_map[speculative_id] = final_ids[url]
+            session.commit()
+            # Keep the remap table bounded over long crawls
+            while len(self._id_map) > self._ID_MAP_MAX:
+                self._id_map.popitem(last=False)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+_case_writer = None
+_case_writer_lock = threading.Lock()
+
+def get_case_writer():
+    """Return the process-wide BatchCaseWriter, creating it on first use"""
+    global _case_writer
+    if _case_writer is None:
+        with _case_writer_lock:
+            if _case_writer is None:
+                _case_writer = BatchCaseWriter()
+    return _case_writer
+
+def close_case_writer():
+    """Flush and stop the shared writer, if one was started"""
+    global _case_writer
+    with _case_writer_lock:
+        if _case_writer is not None:
+            _case_writer.close()
+            _case_writer = None 
\ No newline at end of file
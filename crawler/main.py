@@ -17,6 +17,8 @@ def main():
                        help='Name of the target site to crawl (default: all)')
     parser.add_argument('--use-bfs', action='store_true',
                        help='Use Breadth-First Search instead of Depth-First Search')
+    parser.add_argument('--use-async', action='store_true',
+                       help='Use the asyncio/aiohttp crawl core instead of threads')
     args = parser.parse_args()
     
     # Set configuration based on command line arguments
@@ -35,14 +37,18 @@ def main():
     print(f"Max depth: {args.max_depth}")
     print(f"Number of threads: {config.MAX_THREADS}")
     print(f"Crawl delay: {config.CRAWL_DELAY} seconds")
-    print(f"Traversal method: {'BFS' if args.use_bfs else 'DFS'}")
+    print(f"Traversal method: {'async BFS' if args.use_async else ('BFS' if args.use_bfs else 'DFS')}")
     print(f"Target sites: {[site['name'] for site in selected_sites]}")
-    
+
     create_tables()
     print("Database tables created.")
-    
-    # Use BFS or DFS based on the argument
-    if args.use_bfs:
+
+    # Use async, BFS or DFS based on the arguments
+    if args.use_async:
+        # Imported lazily so the threaded crawler works without aiohttp
+        from .async_crawler import start_crawl_async
+        start_crawl_async(max_depth=args.max_depth, sites=selected_sites)
+    elif args.use_bfs:
         start_crawl_bfs(max_depth=args.max_depth, sites=selected_sites)
     else:
         start_crawl_dfs(max_depth=args.max_depth, sites=selected_sites)
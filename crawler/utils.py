@@ -1,13 +1,41 @@
-# Placeholder for utility functions 
+# Placeholder for utility functions
 
+import re
+from functools import lru_cache
 from urllib.parse import urlparse, urlunparse, urljoin
 
-NON_HTML_EXTENSIONS = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar', '.tar', '.gz']
+from .config import DEFAULT_EXCLUDE_EXTENSIONS
 
+NON_HTML_EXTENSIONS = DEFAULT_EXCLUDE_EXTENSIONS
+
+# All extension rejections folded into one compiled alternation so a
+# skip decision on a raw URL is a single C-level match — no urlparse,
+# no per-extension Python comparisons. Anchored to the end of the
+# string; callers truncate at the first '?'/'#' so only the path's own
+# extension can match, never text inside a query parameter.
+_EXCLUDED_EXT_RE = re.compile(
+    '(?:' + '|'.join(re.escape(ext) for ext in NON_HTML_EXTENSIONS) + ')$',
+    re.IGNORECASE,
+)
+
+def _has_excluded_extension(path):
+    """O(1) check of a path's extension against the shared exclude set.
+
+    One rfind plus one frozenset probe per URL — never a Python loop over
+    the extension list, which this helper exists to replace. This runs
+    for every link on every page, so keep it branch-light.
+    """
+    dot = path.rfind('.')
+    return dot != -1 and path[dot:].lower() in NON_HTML_EXTENSIONS
+
+@lru_cache(maxsize=100_000)
 def normalize_url(url):
     """
     Normalize a URL by removing fragments and skipping non-HTML file types.
     Returns None if the URL should be skipped.
+
+    Cached: the same nav/footer links recur on nearly every page of a
+    site, so repeat calls skip the urlparse work entirely.
     """
     parsed = urlparse(url)
     # Remove fragment
@@ -16,9 +44,8 @@ def normalize_url(url):
     # Remove trailing slash for consistency
     path = parsed.path.rstrip('/')
     # Skip non-HTML file types
-    for ext in NON_HTML_EXTENSIONS:
-        if path.lower().endswith(ext):
-            return None
+    if _has_excluded_extension(path):
+        return None
     # Rebuild the URL without fragment
     normalized = urlunparse(parsed._replace(path=path))
     return normalized
@@ -26,10 +53,25 @@ def normalize_url(url):
 def should_skip_url(url):
     """
     Returns True if the URL should be skipped (e.g., non-HTML file types).
+
+    Matches the path portion (the URL cut at the first '?' or '#')
+    against the combined extension pattern instead of parsing it first;
+    a find plus one regex search replaces urlparse + the per-path
+    extension probe, and query parameters like ?file=doc.pdf can never
+    match.
     """
-    parsed = urlparse(url)
-    path = parsed.path.lower()
-    for ext in NON_HTML_EXTENSIONS:
-        if path.endswith(ext):
-            return True
-    return False 
\ No newline at end of file
+    cut = url.find('?')
+    hash_at = url.find('#')
+    if hash_at != -1 and (cut == -1 or hash_at < cut):
+        cut = hash_at
+    path = url if cut == -1 else url[:cut]
+    return _EXCLUDED_EXT_RE.search(path) is not None
+
+# Compiled fast path: _fast.pyx ports normalize_url to C (built via
+# `python setup.py build_ext --inplace`); repeated links still benefit
+# from the cache, so the compiled version is wrapped the same way.
+try:
+    from ._fast import normalize_url as _c_normalize_url
+    normalize_url = lru_cache(maxsize=100_000)(_c_normalize_url)
+except ImportError:
+    pass
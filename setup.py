@@ -0,0 +1,16 @@
+"""Optional build for the compiled URL helpers in crawler/_fast.pyx.
+
+The crawler is pure Python and runs without this; building the extension
+swaps C implementations of normalize_url and is_valid_url into the
+per-link hot loop. Requires Cython and a C compiler:
+
+    pip install cython
+    python setup.py build_ext --inplace
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='crawl-fast',
+    ext_modules=cythonize('crawler/_fast.pyx', language_level=3),
+)